@@ -10,6 +10,7 @@ DATA_DIR = PROJECT_ROOT / "data"
 INPUT_DIR = DATA_DIR / "input"
 OUTPUT_DIR = DATA_DIR / "output"
 REFERENCE_DIR = DATA_DIR / "reference"
+CACHE_DIR = DATA_DIR / ".cache"
 
 # Ensure directories exist
 for directory in [DATA_DIR, INPUT_DIR, OUTPUT_DIR, REFERENCE_DIR]:
@@ -23,6 +24,20 @@ OLLAMA_MODEL = "llama3.2:3b"  # Can be changed to "mistral" or other models
 LLM_TEMPERATURE = 0.1  # Low temperature for consistent, factual analysis
 LLM_MAX_TOKENS = 4096
 LLM_TIMEOUT = 300  # 5 minutes timeout
+LLM_KEEP_ALIVE = "30m"  # Keep the model (and its prompt cache) loaded between calls
+LLM_NUM_CTX = 16384  # Context window; must hold reference + policy so the shared prefix is not truncated
+
+# Chunked Analysis
+CHUNK_REFERENCE = False  # Analyze each "## " section of the reference framework separately
+CHUNK_CONCURRENCY = 4  # Parallel section requests (match OLLAMA_NUM_PARALLEL on the server)
+
+# Directory Batch Analysis
+BATCH_CONCURRENCY = 1  # Policies analyzed in parallel (match OLLAMA_NUM_PARALLEL on the server)
+
+# Response Cache
+LLM_CACHE_ENABLED = True  # Reuse stored LLM responses for identical inputs
+SEMANTIC_CACHE_ENABLED = False  # Reuse gap analyses of near-identical policies (needs sentence-transformers + faiss)
+SEMANTIC_CACHE_THRESHOLD = 0.95  # Minimum cosine similarity for a semantic cache hit
 
 # Reference Standard
 REFERENCE_FRAMEWORK = "CIS MS-ISAC NIST Cybersecurity Framework"
@@ -2,45 +2,86 @@
 Main Orchestration Script - Policy Gap Analysis Tool
 Coordinates the entire gap analysis and remediation workflow
 """
-import sys
+import asyncio
+import re
+import string
+import time
 from pathlib import Path
 from datetime import datetime
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
 from rich import box
-from rich.prompt import Prompt, Confirm
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent))
-
-from src.document_loader import DocumentLoader
-from src.llm_judge import PolicyJudge
 from src.utils import ComplianceScorer, ResultExporter, ExecutiveSummary
 import config
-import json
 
 console = Console()
 
+# Policy document formats picked up by directory batch mode
+_POLICY_SUFFIXES = {'.pdf', '.txt', '.md', '.markdown'}
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w.-]+')
+
+# Template for the per-step result files written by _save_results
+_REPORT_TPL = string.Template(
+    "# $title\n\n"
+    "**Generated:** $ts  \n"
+    "**Framework:** $fw  \n"
+    "**Model Used:** $model\n\n"
+    "---\n\n"
+    "$body"
+)
+
 
 class PolicyAnalysisPipeline:
     """
     Main pipeline orchestrating the complete policy gap analysis workflow.
     """
     
-    def __init__(self):
-        """Initialize the analysis pipeline."""
+    def __init__(
+        self,
+        use_cache: bool = config.LLM_CACHE_ENABLED,
+        use_semantic_cache: bool = config.SEMANTIC_CACHE_ENABLED,
+        chunk_reference: bool = config.CHUNK_REFERENCE
+    ):
+        """
+        Initialize the analysis pipeline.
+        
+        Args:
+            use_cache: Reuse cached LLM responses for identical inputs
+            use_semantic_cache: Reuse gap analyses of near-identical policies
+            chunk_reference: Analyze reference framework sections in parallel (batch mode)
+        """
+        # Heavy modules are imported on first use to keep CLI startup fast
+        from src.document_loader import DocumentLoader
+        
         # Use enhanced DocumentLoader with smart path searching
         self.doc_loader = DocumentLoader(
             verbose=config.VERBOSE,
             search_dirs=[config.INPUT_DIR, config.REFERENCE_DIR, Path.cwd()]
         )
         self.judge = None  # Initialized when needed
+        self.use_cache = use_cache
+        self.chunk_reference = chunk_reference
+        self.semantic_cache = None
+        if use_semantic_cache:
+            from src.semantic_cache import SemanticCache
+            if SemanticCache.is_available():
+                self.semantic_cache = SemanticCache(verbose=config.VERBOSE)
+            else:
+                console.print("[yellow]⚠ Semantic cache needs sentence-transformers and faiss-cpu; continuing without it[/yellow]")
         self.results = {}
+        self.run_started = None  # time.time() when a run starts; shared by the report timestamps
+        
         self.scorer = ComplianceScorer()
         self.exporter = ResultExporter()
     
     def run_interactive(self):
         """Run the tool in interactive mode."""
+        from rich.prompt import Prompt, Confirm
+        
+        self.run_started = time.time()
+        
         console.print(Panel.fit(
             "[bold cyan]HACK IITK 2026 - Policy Gap Analysis Tool[/bold cyan]\n"
             "[white]Local LLM Powered Cybersecurity Analysis[/white]\n"
@@ -78,7 +119,7 @@ class PolicyAnalysisPipeline:
         # Step 3: Initialize LLM Judge
         console.print("\n[bold]Step 3: Initialize Local LLM[/bold]")
         try:
-            self.judge = PolicyJudge(verbose=config.VERBOSE)
+            self.judge = self._create_judge()
         except Exception as e:
             console.print(f"[red]Failed to initialize LLM: {str(e)}[/red]")
             return
@@ -87,8 +128,8 @@ class PolicyAnalysisPipeline:
         if Confirm.ask("\n[bold]Proceed with Gap Analysis?[/bold]", default=True):
             console.print("\n" + "="*70)
             gap_result = self.judge.analyze_gaps(
-                user_policy_text=user_policy_text,
                 reference_standard_text=reference_text,
+                user_policy_text=user_policy_text,
                 framework_name=config.REFERENCE_FRAMEWORK
             )
             
@@ -97,21 +138,25 @@ class PolicyAnalysisPipeline:
                 
                 # Calculate compliance score
                 console.print("\n[cyan]Calculating compliance score...[/cyan]")
-                score = self.scorer.calculate_score(gap_result['analysis'])
+                analysis_lower = gap_result['analysis'].lower()
+                score = self.scorer.calculate_score(gap_result['analysis'], text_lower=analysis_lower)
                 self.results['compliance_score'] = score
                 self.scorer.display_score(score)
                 
                 # Generate executive summary
                 console.print("\n[cyan]Generating executive summary...[/cyan]")
-                exec_summary = ExecutiveSummary.generate(gap_result['analysis'], score)
+                exec_summary = ExecutiveSummary.generate(
+                    gap_result['analysis'], score, text_lower=analysis_lower, timestamp=datetime.fromtimestamp(self.run_started)
+                )
                 self.results['executive_summary'] = exec_summary
                 
-                self._save_results(gap_result, "gap_analysis")
+                self._save_results(gap_result, "gap_analysis", timestamp=self.run_started)
         
         # Step 5: Remediation
         if 'gap_analysis' in self.results and Confirm.ask("\n[bold]Generate Remediation Plan?[/bold]", default=True):
             console.print("\n" + "="*70)
             remediation_result = self.judge.generate_remediation(
+                reference_standard_text=reference_text,
                 user_policy_text=user_policy_text,
                 gap_analysis=self.results['gap_analysis']['analysis'],
                 framework_name=config.REFERENCE_FRAMEWORK
@@ -119,7 +164,7 @@ class PolicyAnalysisPipeline:
             
             if remediation_result:
                 self.results['remediation'] = remediation_result
-                self._save_results(remediation_result, "remediation")
+                self._save_results(remediation_result, "remediation", timestamp=self.run_started)
         
         # Step 6: Export options
         if self.results and Confirm.ask("\n[bold]Export complete report (Markdown + JSON)?[/bold]", default=True):
@@ -128,14 +173,19 @@ class PolicyAnalysisPipeline:
         # Summary
         self._print_summary()
     
-    def run_batch(self, user_policy_path: str, reference_path: str):
+    async def run_batch(self, user_policy_path: str, reference_path: str):
         """
         Run the tool in batch mode (non-interactive).
         
+        LLM calls run in worker threads so that writing the gap analysis
+        outputs overlaps with remediation generation.
+        
         Args:
             user_policy_path: Path to user's policy PDF
             reference_path: Path to reference framework PDF
         """
+        self.run_started = time.time()
+        
         console.print(Panel.fit(
             "[bold cyan]Policy Gap Analysis - Batch Mode[/bold cyan]",
             border_style="cyan"
@@ -152,88 +202,262 @@ class PolicyAnalysisPipeline:
         
         # Initialize LLM
         try:
-            self.judge = PolicyJudge(verbose=config.VERBOSE)
+            self.judge = self._create_judge()
         except Exception as e:
             console.print(f"[red]Failed to initialize LLM: {str(e)}[/red]")
             return False
         
-        # Run analysis
-        gap_result = self.judge.analyze_gaps(
-            user_policy_text=user_policy_text,
-            reference_standard_text=reference_text,
-            framework_name=config.REFERENCE_FRAMEWORK
-        )
+        # Run analysis, reusing the result for a near-identical policy if available
+        gap_result = None
+        remediation_result = None
+        remediation_pending = True  # False once the fused call has tried remediation
+        if self.semantic_cache:
+            gap_result = self.semantic_cache.lookup(user_policy_text, reference_text, config.OLLAMA_MODEL)
+        
+        if gap_result is None:
+            if self.chunk_reference:
+                gap_result = await self._analyze_gaps_chunked(user_policy_text, reference_text)
+            else:
+                # Gap analysis and remediation in a single LLM call
+                fused = await asyncio.to_thread(
+                    self.judge.analyze_and_remediate,
+                    reference_standard_text=reference_text,
+                    user_policy_text=user_policy_text,
+                    framework_name=config.REFERENCE_FRAMEWORK
+                )
+                if fused:
+                    gap_result = {k: v for k, v in fused.items() if k != 'remediation'}
+                    if fused['remediation'] is not None:
+                        remediation_result = {k: v for k, v in fused.items() if k != 'analysis'}
+                    remediation_pending = False
+            if gap_result and self.semantic_cache:
+                self.semantic_cache.add(user_policy_text, reference_text, config.OLLAMA_MODEL, gap_result)
         
         if gap_result:
             self.results['gap_analysis'] = gap_result
             
             # Calculate compliance score
-            score = self.scorer.calculate_score(gap_result['analysis'])
+            analysis_lower = gap_result['analysis'].lower()
+            score = self.scorer.calculate_score(
+                gap_result['analysis'], text_lower=analysis_lower, sections=gap_result.get('sections', 1)
+            )
             self.results['compliance_score'] = score
             self.scorer.display_score(score)
             
             # Generate executive summary
-            exec_summary = ExecutiveSummary.generate(gap_result['analysis'], score)
+            exec_summary = ExecutiveSummary.generate(
+                gap_result['analysis'], score, text_lower=analysis_lower, timestamp=datetime.fromtimestamp(self.run_started)
+            )
             self.results['executive_summary'] = exec_summary
-            
-            self._save_results(gap_result, "gap_analysis")
         else:
             return False
         
-        # Run remediation
-        # Export complete report
-        self._export_complete_report()
-        
-        remediation_result = self.judge.generate_remediation(
-            user_policy_text=user_policy_text,
-            gap_analysis=gap_result['analysis'],
-            framework_name=config.REFERENCE_FRAMEWORK
-        )
+        if remediation_pending:
+            # Run remediation (depends only on the gap analysis) while the
+            # gap analysis results are written out
+            remediation_task = asyncio.create_task(asyncio.to_thread(
+                self.judge.generate_remediation,
+                reference_standard_text=reference_text,
+                user_policy_text=user_policy_text,
+                gap_analysis=gap_result['analysis'],
+                framework_name=config.REFERENCE_FRAMEWORK
+            ))
+            
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, lambda: self._save_results(gap_result, "gap_analysis", timestamp=self.run_started)
+            )
+            
+            remediation_result = await remediation_task
+        else:
+            self._save_results(gap_result, "gap_analysis", timestamp=self.run_started)
         
         if remediation_result:
             self.results['remediation'] = remediation_result
-            self._save_results(remediation_result, "remediation")
+            self._save_results(remediation_result, "remediation", timestamp=self.run_started)
+        
+        # Export complete report once everything is available
+        self._export_complete_report()
         
         self._print_summary()
         return True
     
-    def _save_results(self, result: dict, result_type: str):
+    async def _analyze_gaps_chunked(self, user_policy_text: str, reference_text: str):
+        """
+        Run gap analysis separately for each section of the reference framework.
+        
+        Sections are analyzed concurrently (up to config.CHUNK_CONCURRENCY
+        requests at a time) and merged into a single gap analysis result.
+        
+        Args:
+            user_policy_text: The organization's policy text
+            reference_text: The full reference framework text
+            
+        Returns:
+            Merged gap analysis result, or None if every section failed
+        """
+        sections = _split_reference_sections(reference_text)
+        console.print(f"\n[bold cyan]Starting Gap Analysis[/bold cyan] [dim]({len(sections)} framework sections)[/dim]")
+        
+        semaphore = asyncio.Semaphore(config.CHUNK_CONCURRENCY)
+        
+        async def analyze(section: str):
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self.judge.analyze_gaps_section,
+                    user_policy_text=user_policy_text,
+                    section_text=section,
+                    framework_name=config.REFERENCE_FRAMEWORK
+                )
+        
+        section_results = await asyncio.gather(*(analyze(section) for section in sections))
+        gap_result = self.judge.merge_gap_results(section_results)
+        
+        if gap_result:
+            completed = sum(1 for r in section_results if r)
+            console.print(f"[green]✓ Gap Analysis Complete[/green] [dim]({completed}/{len(sections)} sections)[/dim]")
+        return gap_result
+    
+    def run_directory(self, policy_dir: str, reference_path: str) -> bool:
+        """
+        Run gap analysis for every policy document in a directory (non-interactive).
+        
+        All policies are analyzed in one process by a single judge, so the
+        model stays loaded and the reference framework prefix stays cached
+        on the Ollama server between policies. Each policy gets its own
+        gap analysis file and compliance score; remediation plans are not
+        generated in this mode.
+        
+        Args:
+            policy_dir: Directory containing the policy documents
+            reference_path: Path to reference framework document
+        """
+        self.run_started = time.time()
+        
+        console.print(Panel.fit(
+            "[bold cyan]Policy Gap Analysis - Directory Batch Mode[/bold cyan]",
+            border_style="cyan"
+        ))
+        
+        directory = Path(policy_dir)
+        if not directory.is_dir():
+            console.print(f"[red]Error: Not a directory: {policy_dir}[/red]")
+            return False
+        
+        # Load documents
+        console.print("\n[bold]Loading Documents...[/bold]")
+        reference_text = self.doc_loader.extract_text(reference_path)
+        if not reference_text:
+            console.print("[red]Failed to load reference framework. Exiting.[/red]")
+            return False
+        
+        reference_resolved = self.doc_loader._resolve_path(reference_path)
+        policies = []
+        for path in sorted(directory.iterdir()):
+            if path.suffix.lower() not in _POLICY_SUFFIXES or path.resolve() == reference_resolved.resolve():
+                continue
+            text = self.doc_loader.extract_text(path)
+            if text:
+                policies.append((path.name, text))  # Full name: policy.pdf and policy.md must not collide
+        
+        if not policies:
+            console.print(f"[red]No policy documents found in {directory}. Exiting.[/red]")
+            return False
+        
+        # Initialize LLM
+        try:
+            self.judge = self._create_judge()
+        except Exception as e:
+            console.print(f"[red]Failed to initialize LLM: {str(e)}[/red]")
+            return False
+        
+        results = self.judge.analyze_gaps_batch(
+            policies,
+            reference_standard_text=reference_text,
+            framework_name=config.REFERENCE_FRAMEWORK,
+            max_workers=config.BATCH_CONCURRENCY
+        )
+        
+        table = Table(title="Compliance by Policy", box=box.ROUNDED)
+        table.add_column("Policy", style="cyan")
+        table.add_column("Score", justify="right")
+        table.add_column("Risk Level")
+        
+        for (name, _), result in zip(policies, results):
+            if not result:
+                table.add_row(name, "-", "[red]Analysis failed[/red]")
+                continue
+            score = self.scorer.calculate_score(result['analysis'])
+            self._save_results(result, "gap_analysis", name=name, timestamp=self.run_started)
+            table.add_row(name, f"{score['compliance_score']}/100", score['risk_level'])
+        
+        console.print()
+        console.print(table)
+        console.print(f"[dim]Results saved to: {config.OUTPUT_DIR}[/dim]")
+        return any(results)
+    
+    def _create_judge(self):
+        """
+        Create the LLM judge, wrapped in the response cache if enabled.
+        
+        An existing judge is reused so repeated analyses share one Ollama
+        client and the server keeps the reference prefix cached.
+        """
+        if self.judge is not None:
+            return self.judge
+        
+        from src.llm_judge import PolicyJudge
+        from src.llm_cache import CachedPolicyJudge
+        
+        judge = PolicyJudge(verbose=config.VERBOSE)
+        if self.use_cache:
+            judge = CachedPolicyJudge(judge)
+        return judge
+    
+    def _save_results(
+        self,
+        result: dict,
+        result_type: str,
+        name: str = None,
+        timestamp: float = None
+    ):
         """
         Save analysis results to output directory.
         
         Args:
             result: Result dictionary from analysis
             result_type: Type of result ('gap_analysis' or 'remediation')
+            name: Policy name to include in the filename (directory batch mode)
+            timestamp: Run start time.time(), shared by every file of a run (default: now)
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{result_type}_{timestamp}.md"
+        now = time.localtime(timestamp)
+        stamp = time.strftime("%Y%m%d_%H%M%S", now)
+        if name:
+            filename = f"{result_type}_{_UNSAFE_FILENAME_CHARS.sub('_', name)}_{stamp}.md"
+        else:
+            filename = f"{result_type}_{stamp}.md"
         output_path = config.OUTPUT_DIR / filename
         
-        content = f"""# {result_type.replace('_', ' ').title()}
-        
-**Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}  
-**Framework:** {result['framework']}  
-**Model Used:** {result['model_used']}
-
----
-
-"""
-        
-        if result_type == "gap_analysis":
-            content += result['analysis']
-        else:
-            content += result['remediation']
+        content = _REPORT_TPL.substitute(
+            title=result_type.replace('_', ' ').title(),
+            ts=time.strftime("%Y-%m-%d %H:%M:%S", now),
+            fw=result['framework'],
+            model=result['model_used'],
+            body=result['analysis'] if result_type == "gap_analysis" else result['remediation']
+        )
         
         output_path.write_text(content, encoding='utf-8')
         console.print(f"\n[green]✓ Results saved to:[/green] [cyan]{output_path}[/cyan]")
     
     def _export_complete_report(self):
         """Export complete analysis report in multiple formats."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        now_ts = self.run_started or time.time()
+        timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(now_ts))
+        now = datetime.fromtimestamp(now_ts)
         
         # Prepare complete results
         export_data = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now.isoformat(),
             'framework': config.REFERENCE_FRAMEWORK,
             'model': config.OLLAMA_MODEL,
             **self.results
@@ -241,11 +465,11 @@ class PolicyAnalysisPipeline:
         
         # Export to JSON
         json_path = config.OUTPUT_DIR / f"complete_report_{timestamp}.json"
-        self.exporter.export_to_json(export_data, json_path)
+        self.exporter.export_to_json(export_data, json_path, timestamp=now)
         
         # Export enhanced markdown with all sections
         md_path = config.OUTPUT_DIR / f"complete_report_{timestamp}.md"
-        self.exporter.export_to_markdown(export_data, md_path, include_score=True)
+        self.exporter.export_to_markdown(export_data, md_path, include_score=True, timestamp=now)
         
         # Save executive summary separately
         if 'executive_summary' in self.results:
@@ -261,8 +485,8 @@ class PolicyAnalysisPipeline:
         summary_text += f"[white]Gap Analysis: [/white]{'✓' if 'gap_analysis' in self.results else '✗'}\n"
         
         if 'compliance_score' in self.results:
-            score = self.results['compliance_score']['compliance_percentage']
-            summary_text += f"[white]Compliance Score: [/white]{score}\n"
+            score = self.results['compliance_score']['compliance_score']
+            summary_text += f"[white]Compliance Score: [/white]{score}%\n"
         
         summary_text += f"[white]Remediation: [/white]{'✓' if 'remediation' in self.results else '✗'}\n"
         summary_text += f"[white]Executive Summary: [/white]{'✓' if 'executive_summary' in self.results else '✗'}\n\n"
@@ -275,6 +499,23 @@ class PolicyAnalysisPipeline:
         ))
 
 
+def _split_reference_sections(reference_text: str) -> list[str]:
+    """
+    Split a reference framework into its top-level "## " markdown sections.
+    
+    Any text before the first section heading (title, introduction) is kept
+    with the first section. Text without such headings is a single section.
+    """
+    parts = [part.strip() for part in re.split(r'^(?=## )', reference_text, flags=re.M)]
+    parts = [part for part in parts if part]
+    
+    if len(parts) > 1 and not parts[0].startswith('## '):
+        parts[1] = f"{parts[0]}\n\n{parts[1]}"
+        parts = parts[1:]
+    
+    return parts or [reference_text]
+
+
 def main():
     """Main entry point."""
     import argparse
@@ -290,6 +531,12 @@ def main():
         help='Path to user policy PDF file'
     )
     
+    parser.add_argument(
+        '--policy-dir',
+        type=str,
+        help='Directory of policy files to analyze against one reference (batch mode)'
+    )
+    
     parser.add_argument(
         '--reference',
         type=str,
@@ -309,6 +556,24 @@ def main():
         help=f'Ollama model to use (default: {config.OLLAMA_MODEL})'
     )
     
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore cached LLM responses (exact and semantic) and always query the model'
+    )
+    
+    parser.add_argument(
+        '--semantic-cache',
+        action='store_true',
+        help='Reuse gap analyses of near-identical policies in batch mode'
+    )
+    
+    parser.add_argument(
+        '--chunked',
+        action='store_true',
+        help='Analyze each section of the reference framework separately, in parallel (batch mode)'
+    )
+    
     args = parser.parse_args()
     
     # Update model if specified
@@ -316,11 +581,23 @@ def main():
         config.OLLAMA_MODEL = args.model
     
     # Create pipeline
-    pipeline = PolicyAnalysisPipeline()
+    pipeline = PolicyAnalysisPipeline(
+        use_cache=config.LLM_CACHE_ENABLED and not args.no_cache,
+        use_semantic_cache=(config.SEMANTIC_CACHE_ENABLED or args.semantic_cache) and not args.no_cache,
+        chunk_reference=config.CHUNK_REFERENCE or args.chunked
+    )
     
     # Run in appropriate mode
-    if args.batch and args.user_policy and args.reference:
-        pipeline.run_batch(args.user_policy, args.reference)
+    if args.batch and args.policy_dir and args.reference:
+        pipeline.run_directory(args.policy_dir, args.reference)
+    elif args.batch and args.user_policy and args.reference:
+        # uvloop gives a faster event loop where available (not on Windows)
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+        asyncio.run(pipeline.run_batch(args.user_policy, args.reference))
     else:
         pipeline.run_interactive()
 
@@ -2,7 +2,14 @@
 Enhanced Document Loader - Supports PDF, TXT, MD files
 Replaces basic PDF loader with multi-format support
 """
-import fitz  # PyMuPDF
+import hashlib
+import mmap
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 from rich.console import Console
@@ -10,6 +17,56 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 
 console = Console()
 
+# Whitespace around line breaks, and runs of more than one blank line
+_LINE_EDGES = re.compile(r'[^\S\n]*\n[^\S\n]*')
+_BLANK_RUNS = re.compile(r'\n{3,}')
+# Anything either substitution above would change
+_NEEDS_CLEANING = re.compile(r'[^\S\n]\n|\n[^\S\n]|\n\n\n')
+_WORD = re.compile(r'\S+')
+
+# Extracted text cache; bump the version when extraction or cleaning
+# changes so previously cached text is not reused
+TEXT_CACHE_DIR = Path.home() / ".cache" / "policy_gap" / "doc_text"
+TEXT_CACHE_VERSION = 5
+
+# PDFs with at least this many pages are extracted in parallel worker processes
+PARALLEL_PAGE_THRESHOLD = 64
+
+# Pages with less extracted text than this (scanned images, page-number-only
+# pages) are treated as blank
+MIN_PAGE_CHARS = 20
+
+# PDFs up to this size are read into memory and parsed from the buffer;
+# larger files are opened by path to bound memory use
+IN_MEMORY_PDF_LIMIT = 100 * 1024 * 1024
+
+# Header/footer detection: a line among the first or last few non-empty lines
+# of a page is boilerplate if it recurs (digits ignored) on enough pages
+BOILERPLATE_EDGE_LINES = 2
+BOILERPLATE_PAGE_RATIO = 0.3
+BOILERPLATE_MIN_PAGES = 4
+_DIGITS = re.compile(r'\d+')
+
+
+@dataclass(slots=True, frozen=True)
+class DocumentMetadata:
+    """
+    Extracted text and metadata of a document.
+    
+    The PDF fields are None for other formats. Use dataclasses.asdict()
+    where a dictionary is needed.
+    """
+    filename: str
+    format: str
+    text: str
+    word_count: int
+    char_count: int
+    file_size_kb: float
+    page_count: Optional[int] = None
+    title: Optional[str] = None
+    author: Optional[str] = None
+    subject: Optional[str] = None
+
 
 class DocumentLoader:
     """
@@ -19,16 +76,23 @@ class DocumentLoader:
     - Markdown (.md)
     """
     
-    def __init__(self, verbose: bool = True, search_dirs: list[Path] = None):
+    def __init__(
+        self,
+        verbose: bool = True,
+        search_dirs: list[Path] = None,
+        cache_dir: Optional[Path] = TEXT_CACHE_DIR
+    ):
         """
         Initialize the document loader.
         
         Args:
             verbose: Enable detailed console output
             search_dirs: Directories to search for files if not found at given path
+            cache_dir: Directory for cached extracted text (None disables caching)
         """
         self.verbose = verbose
         self.search_dirs = search_dirs or []
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
         
     def extract_text(self, file_path: str | Path) -> Optional[str]:
         """
@@ -49,19 +113,98 @@ class DocumentLoader:
                 console.print(f"[yellow]Searched in: {', '.join(str(d) for d in self.search_dirs)}[/yellow]")
             return None
         
-        file_path = resolved_path
+        text, _ = self._load_resolved(resolved_path)
+        return text
+    
+    def _load_resolved(self, file_path: Path, pdf_info: bool = False) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Extract text from a resolved path, reusing cached text when possible.
+        
+        Args:
+            file_path: Existing path to the document file
+            pdf_info: For PDFs, also return the document metadata and page
+                count, read from the same open as the text
+            
+        Returns:
+            (text, info); info is None unless pdf_info is set and the file
+            is a PDF whose metadata could be read
+        """
         suffix = file_path.suffix.lower()
         
+        if suffix not in ['.pdf', '.txt', '.md', '.markdown']:
+            console.print(f"[red]Error: Unsupported file format: {suffix}[/red]")
+            console.print(f"[yellow]Supported formats: .pdf, .txt, .md[/yellow]")
+            return None, None
+        
+        # Reuse previously extracted text for identical file contents
+        fingerprint = self._fingerprint(file_path)
+        cached = self._read_cache(fingerprint)
+        if cached is not None:
+            if self.verbose:
+                console.print(f"[green]✓ Loaded cached text for {file_path.name} ({len(cached):,} characters)[/green]")
+            info = self._read_pdf_info(file_path) if pdf_info and suffix == '.pdf' else None
+            return cached, info
+        
         # Route to appropriate extractor
+        info = None
         if suffix == '.pdf':
-            return self._extract_pdf(file_path)
-        elif suffix in ['.txt', '.md', '.markdown']:
-            return self._extract_text_file(file_path)
+            result = self._extract_pdf_full(file_path)
+            text = result[0] if result else None
+            if result and pdf_info:
+                info = {'metadata': result[1], 'page_count': result[2]}
         else:
-            console.print(f"[red]Error: Unsupported file format: {suffix}[/red]")
-            console.print(f"[yellow]Supported formats: .pdf, .txt, .md[/yellow]")
+            text = self._extract_text_file(file_path)
+        
+        if text is not None:
+            self._write_cache(fingerprint, text)
+        return text, info
+    
+    def _fingerprint(self, file_path: Path) -> Optional[str]:
+        """
+        Hash a file's contents for use as a text cache key.
+        
+        Args:
+            file_path: Path to the document file
+            
+        Returns:
+            Hex digest of the file contents, or None if caching is disabled
+            or the file cannot be read
+        """
+        if self.cache_dir is None:
+            return None
+        
+        digest = hashlib.blake2b(f"v{TEXT_CACHE_VERSION}:".encode(), digest_size=16)
+        try:
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        digest.update(mapped)
+        except (OSError, ValueError):
+            return None
+        return digest.hexdigest()
+    
+    def _read_cache(self, fingerprint: Optional[str]) -> Optional[str]:
+        """Return cached text for a fingerprint, or None on a miss."""
+        if fingerprint is None:
+            return None
+        try:
+            return (self.cache_dir / f"{fingerprint}.txt").read_bytes().decode('utf-8')
+        except (OSError, UnicodeDecodeError):
             return None
     
+    def _write_cache(self, fingerprint: Optional[str], text: str):
+        """Store extracted text under a fingerprint, replacing the file atomically."""
+        if fingerprint is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self.cache_dir / f"{fingerprint}.txt"
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp_file.write_bytes(text.encode('utf-8'))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass  # Caching is best-effort
+    
     def _resolve_path(self, file_path: str | Path) -> Optional[Path]:
         """
         Resolve file path with smart searching in configured directories.
@@ -72,28 +215,39 @@ class DocumentLoader:
         Returns:
             Resolved Path object or None if not found
         """
-        file_path = Path(file_path)
-        
-        # If absolute path and exists, use it
-        if file_path.is_absolute() and file_path.exists():
-            return file_path
-        
-        # If relative path exists from current directory
-        if file_path.exists():
-            return file_path
+        try:
+            resolved, found_in = _resolve_path_cached(str(file_path), tuple(self.search_dirs), os.getcwd())
+        except FileNotFoundError:
+            return None
         
-        # Search in configured directories
-        for search_dir in self.search_dirs:
-            candidate = search_dir / file_path.name
-            if candidate.exists():
-                if self.verbose:
-                    console.print(f"[cyan]Found file in:[/cyan] {search_dir}")
-                return candidate
+        if found_in is not None and self.verbose:
+            console.print(f"[cyan]Found file in:[/cyan] {found_in}")
+        return resolved
+    
+    def _extract_pdf(self, pdf_path: Path, fast: bool = True) -> Optional[str]:
+        """
+        Extract text from PDF file using PyMuPDF.
         
-        return None
+        Args:
+            pdf_path: Path to the PDF file
+            fast: Use plain-text extraction flags; set False to keep
+                ligatures and image blocks for complex layouts
+        """
+        result = self._extract_pdf_full(pdf_path, fast)
+        return result[0] if result else None
     
-    def _extract_pdf(self, pdf_path: Path) -> Optional[str]:
-        """Extract text from PDF file using PyMuPDF."""
+    def _extract_pdf_full(self, pdf_path: Path, fast: bool = True) -> Optional[tuple[str, dict, int]]:
+        """
+        Extract text, document metadata and page count from a single open of a PDF.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            fast: Use plain-text extraction flags; set False to keep
+                ligatures and image blocks for complex layouts
+            
+        Returns:
+            (text, metadata, page_count), or None if extraction fails
+        """
         try:
             if self.verbose:
                 console.print(f"[cyan]Loading PDF:[/cyan] {pdf_path.name}")
@@ -104,38 +258,91 @@ class DocumentLoader:
                 console=console,
                 transient=True
             ) as progress:
-                task = progress.add_task("Extracting text from PDF...", total=None)
-                
                 # Open the PDF
-                doc = fitz.open(pdf_path)
-                text_content = []
-                page_count = len(doc)  # Store page count before closing
+                doc = _open_pdf(pdf_path)
+                page_count = len(doc)  # Store page count and metadata before closing
+                doc_metadata = dict(doc.metadata or {})
+                task = progress.add_task("Extracting text from PDF...", total=page_count)
                 
-                # Extract text from each page
-                for page_num in range(page_count):
-                    page = doc[page_num]
-                    text_content.append(page.get_text())
-                
-                doc.close()
-                progress.update(task, completed=True)
+                if page_count >= PARALLEL_PAGE_THRESHOLD and (os.cpu_count() or 1) > 1:
+                    doc.close()
+                    page_texts = self._extract_pages_parallel(pdf_path, page_count, progress, task, fast)
+                else:
+                    # Extract text from each page
+                    flags = _text_flags(fast)
+                    page_texts = []
+                    for page in doc:
+                        page_texts.append(_page_text(page, flags, fast))
+                        progress.advance(task)
+                    doc.close()
             
-            # Combine all pages
-            full_text = "\n\n".join(text_content)
+            # Drop repeated headers/footers, then join pages with blank lines
+            full_text = "\n\n".join(self._strip_boilerplate(page_texts))
+            del page_texts
             
             # Clean up the text
             full_text = self._clean_text(full_text)
             
             if self.verbose:
-                word_count = len(full_text.split())
+                word_count = _word_count(full_text)
                 char_count = len(full_text)
                 console.print(f"[green]✓ Extracted {page_count} pages, {word_count:,} words, {char_count:,} characters[/green]")
             
-            return full_text
+            return full_text, doc_metadata, page_count
             
         except Exception as e:
             console.print(f"[red]Error extracting PDF: {str(e)}[/red]")
             return None
     
+    def _read_pdf_info(self, pdf_path: Path) -> Optional[dict]:
+        """Read a PDF's metadata and page count without extracting its text."""
+        try:
+            with _open_pdf(pdf_path) as doc:
+                return {'metadata': dict(doc.metadata or {}), 'page_count': len(doc)}
+        except Exception:
+            return None
+    
+    def _extract_pages_parallel(
+        self,
+        pdf_path: Path,
+        page_count: int,
+        progress: Progress,
+        task,
+        fast: bool = True
+    ) -> list[str]:
+        """
+        Extract page text using a pool of worker processes.
+        
+        PyMuPDF is not thread-safe, so each worker process opens the
+        document itself and extracts a contiguous range of pages.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            page_count: Number of pages in the document
+            progress: Progress display to advance as ranges complete
+            task: Progress task ID
+            fast: Use plain-text extraction flags
+            
+        Returns:
+            The text of each page, in page order
+        """
+        workers = min(8, os.cpu_count() or 1)
+        chunk = -(-page_count // workers)  # Ceiling division
+        starts = list(range(0, page_count, chunk))
+        
+        ranges: list[list[str]] = [[] for _ in starts]
+        with ProcessPoolExecutor(max_workers=len(starts)) as executor:
+            futures = {
+                executor.submit(_extract_page_range, str(pdf_path), start, min(start + chunk, page_count), fast): index
+                for index, start in enumerate(starts)
+            }
+            for future in as_completed(futures):
+                texts = future.result()
+                ranges[futures[future]] = texts
+                progress.advance(task, len(texts))
+        
+        return [text for texts in ranges for text in texts]
+    
     def _extract_text_file(self, file_path: Path) -> Optional[str]:
         """Extract text from TXT or MD file."""
         try:
@@ -150,35 +357,83 @@ class DocumentLoader:
             ) as progress:
                 task = progress.add_task("Reading text file...", total=None)
                 
-                # Read with UTF-8 encoding
-                text = file_path.read_text(encoding='utf-8')
+                # Read once and decode in a single pass; the latin-1
+                # fallback reuses the same bytes
+                data = file_path.read_bytes()
                 progress.update(task, completed=True)
             
+            try:
+                text = data.decode('utf-8')
+            except UnicodeDecodeError:
+                text = data.decode('latin-1')
+                if self.verbose:
+                    console.print(f"[yellow]⚠ Used latin-1 encoding[/yellow]")
+            del data
+            
+            # Bytes are decoded without newline translation, so convert
+            # CRLF and bare CR line endings to \n as text-mode reading would
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            
             # Clean up the text
             text = self._clean_text(text)
             
             if self.verbose:
-                word_count = len(text.split())
+                word_count = _word_count(text)
                 char_count = len(text)
                 console.print(f"[green]✓ Loaded {word_count:,} words, {char_count:,} characters[/green]")
             
             return text
             
-        except UnicodeDecodeError:
-            # Try with different encoding
-            try:
-                text = file_path.read_text(encoding='latin-1')
-                text = self._clean_text(text)
-                if self.verbose:
-                    console.print(f"[yellow]⚠ Used latin-1 encoding[/yellow]")
-                return text
-            except Exception as e:
-                console.print(f"[red]Error reading text file: {str(e)}[/red]")
-                return None
         except Exception as e:
             console.print(f"[red]Error reading text file: {str(e)}[/red]")
             return None
     
+    def _strip_boilerplate(self, page_texts: list[str]) -> list[str]:
+        """
+        Remove running headers and footers from per-page text.
+        
+        The first and last BOILERPLATE_EDGE_LINES non-empty lines of each
+        page are compared with digits ignored, so "Page 3 of 40" matches
+        "Page 4 of 40". Edge lines found on more than BOILERPLATE_PAGE_RATIO
+        of the pages are dropped. Only lines in those edge positions can be
+        removed, and only on pages with more non-empty lines than the edges
+        cover, so short pages (which would be all edge) are left intact.
+        Documents without pages (text files) pass through unchanged.
+        
+        Args:
+            page_texts: Text of each page, in page order
+            
+        Returns:
+            Page texts with boilerplate lines removed
+        """
+        if len(page_texts) < BOILERPLATE_MIN_PAGES:
+            return page_texts
+        
+        pages = []
+        counts = Counter()
+        for text in page_texts:
+            lines = text.splitlines()
+            filled = [i for i, line in enumerate(lines) if line.strip()]
+            edges = {}
+            if len(filled) > 2 * BOILERPLATE_EDGE_LINES:
+                edges = {
+                    i: _DIGITS.sub('#', lines[i].strip())
+                    for i in filled[:BOILERPLATE_EDGE_LINES] + filled[-BOILERPLATE_EDGE_LINES:]
+                }
+            counts.update(set(edges.values()))
+            pages.append((lines, edges))
+        
+        limit = len(page_texts) * BOILERPLATE_PAGE_RATIO
+        drop = {key for key, n in counts.items() if n > limit}
+        if not drop:
+            return page_texts
+        
+        return [
+            "\n".join(line for i, line in enumerate(lines) if edges.get(i) not in drop)
+            for lines, edges in pages
+        ]
+    
     def _clean_text(self, text: str) -> str:
         """
         Clean extracted text by removing excessive whitespace and artifacts.
@@ -189,23 +444,15 @@ class DocumentLoader:
         Returns:
             Cleaned text
         """
-        # Remove multiple consecutive blank lines
-        lines = text.split('\n')
-        cleaned_lines = []
-        prev_blank = False
-        
-        for line in lines:
-            line = line.strip()
-            if line:
-                cleaned_lines.append(line)
-                prev_blank = False
-            elif not prev_blank:
-                cleaned_lines.append('')
-                prev_blank = True
-        
-        return '\n'.join(cleaned_lines)
-    
-    def extract_with_metadata(self, file_path: str | Path) -> Optional[dict]:
+        # Already-clean text (typical for typed Markdown) only needs one scan
+        if _NEEDS_CLEANING.search(text) is None:
+            return text.strip()
+        
+        # Strip every line, then collapse consecutive blank lines into one
+        text = _LINE_EDGES.sub('\n', text)
+        return _BLANK_RUNS.sub('\n\n', text).strip()
+    
+    def extract_with_metadata(self, file_path: str | Path) -> Optional[DocumentMetadata]:
         """
         Extract text along with document metadata.
         
@@ -213,41 +460,132 @@ class DocumentLoader:
             file_path: Path to the document file
             
         Returns:
-            Dictionary containing text and metadata
+            DocumentMetadata containing text and metadata
         """
         resolved_path = self._resolve_path(file_path)
         if not resolved_path:
             return None
         
-        text = self.extract_text(resolved_path)
+        text, pdf_info = self._load_resolved(resolved_path, pdf_info=True)
         
         if text is None:
             return None
         
-        metadata = {
-            'filename': resolved_path.name,
-            'format': resolved_path.suffix.lower(),
-            'text': text,
-            'word_count': len(text.split()),
-            'char_count': len(text),
-            'file_size_kb': resolved_path.stat().st_size / 1024
-        }
-        
-        # Add PDF-specific metadata if applicable
-        if resolved_path.suffix.lower() == '.pdf':
-            try:
-                doc = fitz.open(resolved_path)
-                metadata.update({
-                    'page_count': len(doc),
-                    'title': doc.metadata.get('title', 'Unknown'),
-                    'author': doc.metadata.get('author', 'Unknown'),
-                    'subject': doc.metadata.get('subject', ''),
-                })
-                doc.close()
-            except Exception:
-                pass  # Silently fail for metadata
-        
-        return metadata
+        # Add PDF-specific metadata if applicable (read during extraction)
+        pdf_fields = {}
+        if pdf_info:
+            doc_metadata = pdf_info['metadata']
+            pdf_fields = {
+                'page_count': pdf_info['page_count'],
+                'title': doc_metadata.get('title', 'Unknown'),
+                'author': doc_metadata.get('author', 'Unknown'),
+                'subject': doc_metadata.get('subject', ''),
+            }
+        
+        return DocumentMetadata(
+            filename=resolved_path.name,
+            format=resolved_path.suffix.lower(),
+            text=text,
+            word_count=_word_count(text),
+            char_count=len(text),
+            file_size_kb=resolved_path.stat().st_size / 1024,
+            **pdf_fields
+        )
+
+
+@lru_cache(maxsize=1024)
+def _resolve_path_cached(
+    file_path: str,
+    search_dirs: tuple[Path, ...],
+    cwd: str
+) -> tuple[Path, Optional[Path]]:
+    """
+    Resolve a document path, memoized per path, search directories and
+    working directory (relative paths depend on it).
+    
+    Returns:
+        (resolved path, search directory it was found in or None)
+    
+    Raises:
+        FileNotFoundError: If the file is not found; raising keeps misses
+            out of the cache so a file created later is still found
+    """
+    path = Path(file_path)
+    
+    # Absolute paths, or relative paths that exist from the current directory
+    if path.exists():
+        return path, None
+    
+    # Search in configured directories
+    for search_dir in search_dirs:
+        candidate = search_dir / path.name
+        if candidate.exists():
+            return candidate, search_dir
+    
+    raise FileNotFoundError(file_path)
+
+
+def _word_count(text: str) -> int:
+    """Count whitespace-separated words without building a list of them."""
+    return sum(1 for _ in _WORD.finditer(text))
+
+
+def _text_flags(fast: bool) -> int:
+    """
+    PyMuPDF text extraction flags.
+    
+    The fast set skips ligature preservation and image blocks, which policy
+    prose does not need.
+    """
+    import fitz  # PyMuPDF
+    
+    if fast:
+        return fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES & ~fitz.TEXT_PRESERVE_IMAGES
+    return fitz.TEXTFLAGS_TEXT
+
+
+def _page_text(page: "fitz.Page", flags: int, fast: bool = True) -> str:
+    """
+    Extract the text of one page, returning "" for pages with almost no text.
+    
+    The fast flags already extract plain characters without extra layout
+    work, so that text is simply length-checked. For the slower full flag
+    set, a plain-text probe (flags=0) is run first and pages below the
+    threshold skip the full extraction entirely.
+    """
+    if not fast:
+        probe = page.get_text("text", flags=0)
+        if len(probe.strip()) < MIN_PAGE_CHARS:
+            return ""
+        return page.get_text("text", flags=flags)
+    
+    text = page.get_text("text", flags=flags)
+    return text if len(text.strip()) >= MIN_PAGE_CHARS else ""
+
+
+def _open_pdf(pdf_path: Path) -> "fitz.Document":
+    """
+    Open a PDF, parsing it from an in-memory copy when it is small enough.
+    
+    MuPDF reads the cross-reference table and objects with many small
+    unbuffered seeks; reading the file in one call and parsing the buffer
+    avoids them. The document keeps a reference to the buffer until closed.
+    
+    PyMuPDF is imported here rather than at module level so loading text
+    and Markdown files does not pay for the MuPDF library.
+    """
+    import fitz  # PyMuPDF
+    
+    if pdf_path.stat().st_size <= IN_MEMORY_PDF_LIMIT:
+        return fitz.open(stream=pdf_path.read_bytes(), filetype="pdf")
+    return fitz.open(pdf_path)
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int, fast: bool = True) -> list[str]:
+    """Extract the text of pages [start, stop) in a worker process."""
+    flags = _text_flags(fast)
+    with _open_pdf(Path(pdf_path)) as doc:
+        return [_page_text(page, flags, fast) for page in doc.pages(start, stop)]
 
 
 # Backward compatibility alias
@@ -257,6 +595,7 @@ PDFLoader = DocumentLoader
 # Standalone testing functionality
 if __name__ == "__main__":
     import sys
+    from dataclasses import fields
     from pathlib import Path
     
     if len(sys.argv) < 2:
@@ -281,11 +620,12 @@ if __name__ == "__main__":
     if result:
         console.print("\n[bold green]Extraction Successful![/bold green]")
         console.print(f"\nMetadata:")
-        for key, value in result.items():
-            if key != 'text':
-                console.print(f"  {key}: {value}")
+        for field in fields(result):
+            value = getattr(result, field.name)
+            if field.name != 'text' and value is not None:
+                console.print(f"  {field.name}: {value}")
         
         console.print(f"\n[bold]First 500 characters of extracted text:[/bold]")
-        console.print(result['text'][:500])
+        console.print(result.text[:500])
     else:
         console.print("[red]Extraction failed![/red]")
@@ -0,0 +1,242 @@
+"""
+LLM Response Cache - Exact-match cache for PolicyJudge results
+Re-running the same policy against the same framework skips the LLM entirely
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+from rich.console import Console
+from rich.panel import Panel
+from src.llm_judge import GAP_ANALYSIS_TEMPLATE, REMEDIATION_TEMPLATE, FUSED_TEMPLATE
+import config
+
+console = Console()
+
+# Characters of input encoded at a time while hashing cache keys
+HASH_CHUNK_CHARS = 1 << 20
+
+# Panels (result field, title, border style) rendered for a cached response,
+# matching how PolicyJudge displays the live response
+_GAP_PANEL = ('analysis', "Gap Analysis Results", "green")
+_REMEDIATION_PANEL = ('remediation', "Remediation Recommendations", "blue")
+
+# Prompt template behind each cached task; hashed into the key so editing a
+# prompt misses the cache instead of serving responses to the old one
+_TASK_TEMPLATES = {
+    "gap_analysis": GAP_ANALYSIS_TEMPLATE,
+    "gap_section": GAP_ANALYSIS_TEMPLATE,
+    "fused": FUSED_TEMPLATE,
+    "remediation": REMEDIATION_TEMPLATE,
+}
+
+
+class CachedPolicyJudge:
+    """
+    Wraps a PolicyJudge and caches its results on disk.
+
+    Results are keyed by a SHA-256 of everything that influences the
+    response (model, temperature, framework, input texts, task and its
+    prompt template), so a model, prompt or input change simply misses the
+    cache. Recent entries are also kept in an in-memory LRU to avoid
+    re-reading the JSON files; callers always get their own copy.
+    """
+
+    def __init__(
+        self,
+        judge,
+        cache_dir: Path = config.CACHE_DIR / "llm",
+        max_memory_entries: int = 128
+    ):
+        """
+        Initialize the cache wrapper.
+
+        Args:
+            judge: The PolicyJudge instance to delegate to on cache misses
+            cache_dir: Directory where cached responses are stored as JSON
+            max_memory_entries: Number of responses kept in memory
+        """
+        self.judge = judge
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_entries = max_memory_entries
+        self._memory: OrderedDict[str, Dict[str, str]] = OrderedDict()
+        self._lock = threading.Lock()  # Sections may be analyzed from several threads
+
+    def __getattr__(self, name):
+        """Delegate everything that is not cached to the wrapped judge."""
+        return getattr(self.judge, name)
+
+    def analyze_gaps(
+        self,
+        user_policy_text: str,
+        reference_standard_text: str,
+        framework_name: str = config.REFERENCE_FRAMEWORK
+    ) -> Optional[Dict[str, str]]:
+        """Cached version of PolicyJudge.analyze_gaps."""
+        key = self._make_key("gap_analysis", framework_name, reference_standard_text, user_policy_text)
+        return self._cached(key, lambda: self.judge.analyze_gaps(
+            reference_standard_text=reference_standard_text,
+            user_policy_text=user_policy_text,
+            framework_name=framework_name
+        ), panels=(_GAP_PANEL,))
+
+    def analyze_gaps_batch(
+        self,
+        policies: List[Tuple[str, str]],
+        reference_standard_text: str,
+        framework_name: str = config.REFERENCE_FRAMEWORK,
+        max_workers: int = 1
+    ) -> List[Optional[Dict[str, str]]]:
+        """
+        Cached version of PolicyJudge.analyze_gaps_batch.
+        
+        Entries are shared with analyze_gaps, and only the policies without
+        a cached result are sent to the model.
+        """
+        keys = [
+            self._make_key("gap_analysis", framework_name, reference_standard_text, text)
+            for _, text in policies
+        ]
+        results = [self._lookup(key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+        
+        if self.judge.verbose and len(misses) < len(policies):
+            console.print(f"[green]✓ Using cached LLM responses for {len(policies) - len(misses)} of {len(policies)} policies[/green]")
+        
+        computed = self.judge.analyze_gaps_batch(
+            [policies[i] for i in misses],
+            reference_standard_text=reference_standard_text,
+            framework_name=framework_name,
+            max_workers=max_workers
+        ) if misses else []
+        
+        for i, result in zip(misses, computed):
+            if result is not None:
+                self._store(keys[i], {k: v for k, v in result.items() if k != 'policy'})
+            results[i] = result
+        
+        return [
+            {**result, 'policy': name} if result is not None else None
+            for (name, _), result in zip(policies, results)
+        ]
+    
+    def analyze_and_remediate(
+        self,
+        user_policy_text: str,
+        reference_standard_text: str,
+        framework_name: str = config.REFERENCE_FRAMEWORK
+    ) -> Optional[Dict[str, str]]:
+        """Cached version of PolicyJudge.analyze_and_remediate."""
+        key = self._make_key("fused", framework_name, reference_standard_text, user_policy_text)
+        return self._cached(key, lambda: self.judge.analyze_and_remediate(
+            reference_standard_text=reference_standard_text,
+            user_policy_text=user_policy_text,
+            framework_name=framework_name
+        ), complete=lambda result: result.get('remediation') is not None, panels=(_GAP_PANEL, _REMEDIATION_PANEL))
+
+    def analyze_gaps_section(
+        self,
+        user_policy_text: str,
+        section_text: str,
+        framework_name: str = config.REFERENCE_FRAMEWORK
+    ) -> Optional[Dict[str, str]]:
+        """Cached version of PolicyJudge.analyze_gaps_section."""
+        key = self._make_key("gap_section", framework_name, section_text, user_policy_text)
+        return self._cached(key, lambda: self.judge.analyze_gaps_section(
+            user_policy_text=user_policy_text,
+            section_text=section_text,
+            framework_name=framework_name
+        ))
+
+    def generate_remediation(
+        self,
+        user_policy_text: str,
+        gap_analysis: str,
+        framework_name: str = config.REFERENCE_FRAMEWORK,
+        reference_standard_text: str = ""
+    ) -> Optional[Dict[str, str]]:
+        """Cached version of PolicyJudge.generate_remediation."""
+        key = self._make_key("remediation", framework_name, reference_standard_text, user_policy_text, gap_analysis)
+        return self._cached(key, lambda: self.judge.generate_remediation(
+            reference_standard_text=reference_standard_text,
+            user_policy_text=user_policy_text,
+            gap_analysis=gap_analysis,
+            framework_name=framework_name
+        ), panels=(_REMEDIATION_PANEL,))
+
+    def _make_key(self, task: str, framework_name: str, *texts: str) -> str:
+        """
+        Build the cache key for a task and its inputs.
+        
+        The inputs are fed to the hash piece by piece rather than joined
+        first, so multi-megabyte policy and framework texts are not copied
+        into a temporary string and bytes object just to be hashed.
+        """
+        digest = hashlib.sha256()
+        for part in (self.judge.model_name, str(self.judge.temperature), framework_name, *texts, task, _TASK_TEMPLATES[task]):
+            for start in range(0, len(part), HASH_CHUNK_CHARS):
+                digest.update(part[start:start + HASH_CHUNK_CHARS].encode('utf-8'))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _cached(self, key: str, compute, complete=None, panels=()) -> Optional[Dict[str, str]]:
+        """
+        Return the cached result for key, computing and storing it on a miss.
+        
+        A computed result is only stored if complete(result) is true (when
+        given), so partial results are retried on the next run. On a hit
+        with verbose output, the cached text is shown in the given panels,
+        as the live response would have been.
+        """
+        result = self._lookup(key)
+        if result is not None:
+            if self.judge.verbose:
+                console.print("[green]✓ Using cached LLM response[/green] [dim](run with --no-cache to regenerate)[/dim]")
+                for field, title, border_style in panels:
+                    if result.get(field):
+                        console.print(Panel(result[field], title=f"[bold]{title}[/bold]", border_style=border_style))
+            return result
+
+        result = compute()
+        if result is not None and (complete is None or complete(result)):
+            self._store(key, result)
+        return result
+
+    def _lookup(self, key: str) -> Optional[Dict[str, str]]:
+        """Look up a key in memory, then on disk, returning a copy of the entry."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return dict(self._memory[key])
+
+        cache_file = self.cache_dir / f"{key}.json"
+        try:
+            result = json.loads(cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, result)
+        return dict(result)
+
+    def _store(self, key: str, result: Dict[str, str]):
+        """Store a result in memory and atomically on disk."""
+        self._remember(key, dict(result))
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self.cache_dir / f"{key}.json"
+            tmp_file = cache_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps(result, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            console.print(f"[yellow]⚠ Could not write LLM cache: {str(e)}[/yellow]")
+
+    def _remember(self, key: str, result: Dict[str, str]):
+        """Add a result to the in-memory LRU, evicting the oldest entry."""
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
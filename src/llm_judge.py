@@ -2,17 +2,115 @@
 Module 2: LLM Judge - Gap Analysis Engine
 Uses local Ollama LLM to analyze policy gaps against NIST standards
 """
-from langchain_community.llms import Ollama
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
 from rich.panel import Panel
+from rich.live import Live
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from typing import Optional, Dict
+from rich.text import Text
+from typing import Optional, Dict, List, Tuple
 import config
 
 console = Console()
 
+# Marker lines separating the two parts of a fused analysis + remediation response
+GAP_MARKER = "=== GAP ANALYSIS ==="
+REMEDIATION_MARKER = "=== REMEDIATION ==="
+_REMEDIATION_SPLIT = re.compile(r'^[ \t*#]*=+\s*REMEDIATION\s*=+[ \t*]*$', re.M | re.I)
+_GAP_MARKER_LINE = re.compile(r'\A\s*[*#]*\s*=+\s*GAP ANALYSIS\s*=+[ \t*]*\n?', re.I)
+
+
+# Prompt templates, filled with str.format. Every template starts with
+# CONTEXT_PREFIX (static instructions, then the reference framework, then the
+# policy), so Ollama's prefix cache can skip prefill over it on later calls.
+# Keep it free of timestamps or other per-call values.
+CONTEXT_PREFIX = """You are an expert cybersecurity policy analyst and policy writer specializing in {framework_name}.
+
+**REFERENCE FRAMEWORK ({framework_name}):**
+{reference_standard}
+
+**ORGANIZATION'S CURRENT POLICY:**
+{user_policy}
+
+"""
+
+# Content and format requirements for a gap analysis
+GAP_ANALYSIS_REQUIREMENTS = """**YOUR ANALYSIS MUST INCLUDE:**
+
+1. **MISSING PROVISIONS**: Identify critical security controls, policies, or procedures that are present in the reference framework but completely absent from the organization's policy.
+
+2. **WEAK OR INCOMPLETE AREAS**: Highlight sections where the organization's policy exists but is insufficient, vague, or less comprehensive than the framework requirements.
+
+3. **COMPLIANCE GAPS**: List specific framework requirements that are not adequately addressed.
+
+4. **RISK ASSESSMENT**: Evaluate the severity of each gap (Critical, High, Medium, Low) and explain the potential security risks.
+
+5. **PRIORITY AREAS**: Identify the top 5 most critical gaps that should be addressed immediately.
+
+**OUTPUT FORMAT:**
+Provide a structured analysis with clear headings and bullet points. Be specific, citing exact sections from both documents when possible."""
+
+# Content and format requirements for a remediation plan
+REMEDIATION_REQUIREMENTS = """**YOUR REMEDIATION PLAN MUST INCLUDE:**
+
+1. **EXECUTIVE SUMMARY**: Brief overview of required changes (2-3 paragraphs).
+
+2. **SPECIFIC RECOMMENDATIONS**: For each identified gap, provide:
+   - Clear description of what needs to be added/changed
+   - Rationale based on the framework
+   - Implementation priority (Immediate, Short-term, Long-term)
+
+3. **REVISED POLICY SECTIONS**: Draft the actual policy text that should be added or modified. Write this in professional policy language, ready to be inserted into the organization's policy document.
+
+4. **IMPLEMENTATION ROADMAP**: Suggest a phased approach for implementing these changes.
+
+5. **COMPLIANCE VALIDATION**: List specific checkpoints to verify compliance after implementation.
+
+**OUTPUT FORMAT:**
+Provide a structured remediation plan with clear sections. Draft policy text should be clearly marked and ready for copy-paste into the organization's policy documents."""
+
+# Gap analysis; this is the core logic that guides the LLM's analysis
+GAP_ANALYSIS_TEMPLATE = CONTEXT_PREFIX + """**TASK: GAP ANALYSIS**
+
+Your task is to perform a comprehensive gap analysis by comparing the organization's current policy against the reference cybersecurity framework above.
+
+""" + GAP_ANALYSIS_REQUIREMENTS + """
+
+Begin your analysis:"""
+
+# Remediation plan for a completed gap analysis
+REMEDIATION_TEMPLATE = CONTEXT_PREFIX + """**TASK: REMEDIATION PLAN**
+
+Based on the gap analysis performed against {framework_name}, you must now generate specific remediation recommendations and draft revised policy sections.
+
+**GAP ANALYSIS FINDINGS:**
+{gap_analysis}
+
+""" + REMEDIATION_REQUIREMENTS + """
+
+Begin your remediation plan:"""
+
+# Gap analysis and remediation plan in a single response, separated by marker lines
+FUSED_TEMPLATE = CONTEXT_PREFIX + """**TASK: GAP ANALYSIS AND REMEDIATION PLAN**
+
+Your task is to perform a comprehensive gap analysis by comparing the organization's current policy against the reference cybersecurity framework above, and then to write a remediation plan for the gaps you found.
+
+Your response must have exactly two parts. Start each part with its marker line, written exactly as shown on a line of its own.
+
+""" + GAP_MARKER + """
+
+""" + GAP_ANALYSIS_REQUIREMENTS + """
+
+""" + REMEDIATION_MARKER + """
+
+Based on your gap analysis, generate specific remediation recommendations and draft revised policy sections.
+
+""" + REMEDIATION_REQUIREMENTS + """
+
+Begin your response with the gap analysis marker line:"""
+
 
 class PolicyJudge:
     """
@@ -46,6 +144,10 @@ class PolicyJudge:
     
     def _initialize_llm(self):
         """Initialize connection to local Ollama instance."""
+        # Imported here: LangChain's import chain is slow and only needed
+        # once an LLM is actually used
+        from langchain_community.llms import Ollama
+        
         try:
             if self.verbose:
                 console.print(f"[cyan]Connecting to Ollama at {self.base_url}...[/cyan]")
@@ -54,7 +156,9 @@ class PolicyJudge:
                 model=self.model_name,
                 base_url=self.base_url,
                 temperature=self.temperature,
-                timeout=config.LLM_TIMEOUT
+                timeout=config.LLM_TIMEOUT,
+                keep_alive=config.LLM_KEEP_ALIVE,
+                num_ctx=config.LLM_NUM_CTX
             )
             
             if self.verbose:
@@ -86,47 +190,15 @@ class PolicyJudge:
             console.print(f"\n[bold cyan]Starting Gap Analysis[/bold cyan]")
             console.print(f"Framework: {framework_name}\n")
         
-        # Create the gap analysis prompt
-        gap_prompt_template = self._create_gap_analysis_prompt()
-        
-        prompt = PromptTemplate(
-            input_variables=["user_policy", "reference_standard", "framework_name"],
-            template=gap_prompt_template
-        )
-        
-        # Create LangChain chain
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        
         try:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console,
-                transient=False
-            ) as progress:
-                task = progress.add_task(
-                    f"[cyan]Analyzing policy against {framework_name}...",
-                    total=None
-                )
-                
-                # Run the analysis
-                response = chain.invoke({
-                    "user_policy": user_policy_text,
-                    "reference_standard": reference_standard_text,
-                    "framework_name": framework_name
-                })
-                
-                progress.update(task, completed=True)
-            
-            analysis_text = response['text']
+            # Run the analysis, showing the response as it is generated
+            analysis_text = self._run_gap_chain(
+                user_policy_text, reference_standard_text, framework_name,
+                stream_title="Gap Analysis Results"
+            )
             
             if self.verbose:
                 console.print("\n[green]✓ Gap Analysis Complete[/green]\n")
-                console.print(Panel(
-                    analysis_text,
-                    title="[bold]Gap Analysis Results[/bold]",
-                    border_style="green"
-                ))
             
             return {
                 'framework': framework_name,
@@ -138,64 +210,219 @@ class PolicyJudge:
             console.print(f"[red]Error during gap analysis: {str(e)}[/red]")
             return None
     
-    def generate_remediation(
+    def analyze_gaps_batch(
+        self,
+        policies: List[Tuple[str, str]],
+        reference_standard_text: str,
+        framework_name: str = config.REFERENCE_FRAMEWORK,
+        max_workers: int = 1
+    ) -> List[Optional[Dict[str, str]]]:
+        """
+        Perform gap analysis for several policies against the same reference standard.
+        
+        Every prompt starts with the same instructions and reference text,
+        so with one judge (and one Ollama client) kept alive, the server's
+        prompt cache pays prefill over the framework only once. With
+        max_workers > 1 the first policy is analyzed alone so the prefix is
+        cached before parallel requests start; parallel analyses print no
+        live output.
+        
+        Args:
+            policies: (name, text) pairs of the policies to analyze
+            reference_standard_text: The reference framework (e.g., NIST CSF)
+            framework_name: Name of the reference framework
+            max_workers: Number of policies analyzed concurrently
+            
+        Returns:
+            One gap analysis result per policy, in input order (None where
+            the analysis failed), each including the policy name
+        """
+        def analyze(policy: Tuple[str, str], quiet: bool) -> Optional[Dict[str, str]]:
+            name, text = policy
+            if not quiet:
+                if self.verbose:
+                    console.print(f"\n[bold]Policy:[/bold] {name}")
+                result = self.analyze_gaps(text, reference_standard_text, framework_name)
+            else:
+                try:
+                    result = {
+                        'framework': framework_name,
+                        'analysis': self._run_gap_chain(text, reference_standard_text, framework_name),
+                        'model_used': self.model_name
+                    }
+                except Exception as e:
+                    console.print(f"[red]Error during gap analysis of '{name}': {str(e)}[/red]")
+                    result = None
+            return {'policy': name, **result} if result else None
+        
+        if max_workers <= 1 or len(policies) <= 1:
+            return [analyze(policy, quiet=False) for policy in policies]
+        
+        results = [analyze(policies[0], quiet=False)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results.extend(executor.map(lambda policy: analyze(policy, quiet=True), policies[1:]))
+        return results
+    
+    def analyze_gaps_section(
         self,
         user_policy_text: str,
-        gap_analysis: str,
+        section_text: str,
         framework_name: str = config.REFERENCE_FRAMEWORK
     ) -> Optional[Dict[str, str]]:
         """
-        Generate remediation recommendations and revised policy sections.
+        Perform gap analysis against a single section of the reference standard.
+        
+        Unlike analyze_gaps, this prints no progress display, so several
+        sections can be analyzed concurrently from worker threads.
         
         Args:
-            user_policy_text: Original policy text
-            gap_analysis: Results from gap analysis
-            framework_name: Name of reference framework
+            user_policy_text: The organization's current policy document
+            section_text: One section of the reference framework
+            framework_name: Name of the reference framework
             
         Returns:
-            Dictionary containing remediation recommendations
+            Dictionary containing the section title and its gap analysis
         """
-        if self.verbose:
-            console.print(f"\n[bold cyan]Generating Remediation Plan[/bold cyan]\n")
+        heading = re.search(r'^##\s+(.+)$', section_text, flags=re.M)
+        title = heading.group(1).strip() if heading else framework_name
         
-        remediation_prompt_template = self._create_remediation_prompt()
+        try:
+            analysis_text = self._run_gap_chain(user_policy_text, section_text, framework_name)
+        except Exception as e:
+            console.print(f"[red]Error during gap analysis of section '{title}': {str(e)}[/red]")
+            return None
         
-        prompt = PromptTemplate(
-            input_variables=["user_policy", "gap_analysis", "framework_name"],
-            template=remediation_prompt_template
-        )
+        return {
+            'framework': framework_name,
+            'section': title,
+            'analysis': analysis_text,
+            'model_used': self.model_name
+        }
+    
+    @staticmethod
+    def merge_gap_results(results: List[Optional[Dict[str, str]]]) -> Optional[Dict[str, str]]:
+        """
+        Merge per-section gap analyses into a single gap analysis result.
         
-        chain = LLMChain(llm=self.llm, prompt=prompt)
+        Args:
+            results: Results from analyze_gaps_section (failed sections are None)
+            
+        Returns:
+            Combined gap analysis result, or None if every section failed.
+            'sections' holds the number of merged section analyses, for
+            normalizing the compliance score.
+        """
+        completed = [r for r in results if r]
+        if not completed:
+            return None
         
-        try:
+        return {
+            'framework': completed[0]['framework'],
+            'analysis': "\n\n".join(f"## {r['section']}\n\n{r['analysis']}" for r in completed),
+            'model_used': completed[0]['model_used'],
+            'sections': len(completed)
+        }
+    
+    def _run_gap_chain(
+        self,
+        user_policy_text: str,
+        reference_standard_text: str,
+        framework_name: str,
+        stream_title: Optional[str] = None
+    ) -> str:
+        """Run the gap analysis prompt through the LLM and return the response text."""
+        return self._generate(GAP_ANALYSIS_TEMPLATE, {
+            "reference_standard": reference_standard_text,
+            "user_policy": user_policy_text,
+            "framework_name": framework_name
+        }, stream_title=stream_title, border_style="green")
+    
+    def _generate(
+        self,
+        template: str,
+        variables: Dict[str, str],
+        stream_title: Optional[str] = None,
+        border_style: str = "cyan"
+    ) -> str:
+        """
+        Fill a prompt template and run it through the LLM.
+        
+        With a stream_title and verbose output, tokens are rendered in a
+        live panel as they arrive instead of after the full completion.
+        A streamed panel must not interleave with other console output, so
+        calls from worker threads (asyncio.to_thread) show a spinner while
+        the full completion runs and print the finished panel afterwards.
+        
+        Args:
+            template: Prompt template, filled with str.format
+            variables: Values for the template's fields
+            stream_title: Title of the response panel; None disables the
+                display (for prompts run concurrently from thread pools)
+            border_style: Border style of the response panel
+            
+        Returns:
+            The complete response text
+        """
+        prompt = template.format(**variables)
+        if not (self.verbose and stream_title):
+            return self.llm.invoke(prompt)
+        
+        if threading.current_thread() is not threading.main_thread():
             with Progress(
                 SpinnerColumn(),
                 TextColumn("[progress.description]{task.description}"),
                 console=console,
-                transient=False
+                transient=True
             ) as progress:
-                task = progress.add_task(
-                    "[cyan]Generating remediation recommendations...",
-                    total=None
-                )
-                
-                response = chain.invoke({
-                    "user_policy": user_policy_text,
-                    "gap_analysis": gap_analysis,
-                    "framework_name": framework_name
-                })
-                
-                progress.update(task, completed=True)
+                progress.add_task(f"[cyan]Generating {stream_title.lower()}...", total=None)
+                response_text = self.llm.invoke(prompt)
+            
+            console.print(Panel(response_text, title=f"[bold]{stream_title}[/bold]", border_style=border_style))
+            return response_text
+        
+        chunks = []
+        body = Text()
+        panel = Panel(body, title=f"[bold]{stream_title}[/bold]", border_style=border_style)
+        with Live(panel, console=console, refresh_per_second=8, vertical_overflow="visible"):
+            for chunk in self.llm.stream(prompt):
+                chunks.append(chunk)
+                body.append(chunk)
+        return "".join(chunks)
+    
+    def generate_remediation(
+        self,
+        user_policy_text: str,
+        gap_analysis: str,
+        framework_name: str = config.REFERENCE_FRAMEWORK,
+        reference_standard_text: str = ""
+    ) -> Optional[Dict[str, str]]:
+        """
+        Generate remediation recommendations and revised policy sections.
+        
+        Args:
+            user_policy_text: Original policy text
+            gap_analysis: Results from gap analysis
+            framework_name: Name of reference framework
+            reference_standard_text: The reference framework used for the gap
+                analysis. Passing the same text lets Ollama reuse the cached
+                prompt prefix from the gap analysis call.
             
-            remediation_text = response['text']
+        Returns:
+            Dictionary containing remediation recommendations
+        """
+        if self.verbose:
+            console.print(f"\n[bold cyan]Generating Remediation Plan[/bold cyan]\n")
+        
+        try:
+            remediation_text = self._generate(REMEDIATION_TEMPLATE, {
+                "reference_standard": reference_standard_text,
+                "user_policy": user_policy_text,
+                "gap_analysis": gap_analysis,
+                "framework_name": framework_name
+            }, stream_title="Remediation Recommendations", border_style="blue")
             
             if self.verbose:
                 console.print("\n[green]✓ Remediation Plan Generated[/green]\n")
-                console.print(Panel(
-                    remediation_text,
-                    title="[bold]Remediation Recommendations[/bold]",
-                    border_style="blue"
-                ))
             
             return {
                 'framework': framework_name,
@@ -207,71 +434,84 @@ class PolicyJudge:
             console.print(f"[red]Error generating remediation: {str(e)}[/red]")
             return None
     
-    def _create_gap_analysis_prompt(self) -> str:
+    def analyze_and_remediate(
+        self,
+        user_policy_text: str,
+        reference_standard_text: str,
+        framework_name: str = config.REFERENCE_FRAMEWORK
+    ) -> Optional[Dict[str, str]]:
         """
-        Create the prompt template for gap analysis.
-        This is the core logic that guides the LLM's analysis.
+        Perform gap analysis and generate the remediation plan in one LLM call.
+        
+        The policy and framework are sent and prefilled once instead of
+        twice. If the model does not produce the remediation marker, the
+        remediation plan is generated with a separate call; if that fails
+        too, the gap analysis is still returned, with remediation None.
+        
+        Args:
+            user_policy_text: The organization's current policy document
+            reference_standard_text: The reference framework (e.g., NIST CSF)
+            framework_name: Name of the reference framework
+            
+        Returns:
+            Dictionary containing the gap analysis and the remediation plan
+            (None if it could not be generated), or None if the analysis failed
         """
-        return """You are an expert cybersecurity policy analyst specializing in {framework_name}.
-
-Your task is to perform a comprehensive gap analysis by comparing the organization's current policy against the reference cybersecurity framework.
-
-**REFERENCE FRAMEWORK ({framework_name}):**
-{reference_standard}
-
-**ORGANIZATION'S CURRENT POLICY:**
-{user_policy}
-
-**YOUR ANALYSIS MUST INCLUDE:**
-
-1. **MISSING PROVISIONS**: Identify critical security controls, policies, or procedures that are present in the reference framework but completely absent from the organization's policy.
-
-2. **WEAK OR INCOMPLETE AREAS**: Highlight sections where the organization's policy exists but is insufficient, vague, or less comprehensive than the framework requirements.
-
-3. **COMPLIANCE GAPS**: List specific framework requirements that are not adequately addressed.
-
-4. **RISK ASSESSMENT**: Evaluate the severity of each gap (Critical, High, Medium, Low) and explain the potential security risks.
-
-5. **PRIORITY AREAS**: Identify the top 5 most critical gaps that should be addressed immediately.
-
-**OUTPUT FORMAT:**
-Provide a structured analysis with clear headings and bullet points. Be specific, citing exact sections from both documents when possible.
-
-Begin your analysis:"""
+        if self.verbose:
+            console.print(f"\n[bold cyan]Starting Gap Analysis and Remediation Plan[/bold cyan]")
+            console.print(f"Framework: {framework_name}\n")
+        
+        try:
+            response_text = self._generate(FUSED_TEMPLATE, {
+                "reference_standard": reference_standard_text,
+                "user_policy": user_policy_text,
+                "framework_name": framework_name
+            }, stream_title="Gap Analysis and Remediation", border_style="green")
+            
+            analysis_text, remediation_text = self._split_fused_response(response_text)
+            
+        except Exception as e:
+            console.print(f"[red]Error during gap analysis: {str(e)}[/red]")
+            return None
+        
+        if self.verbose:
+            console.print("\n[green]✓ Gap Analysis Complete[/green]\n")
+        
+        if remediation_text is None:
+            if self.verbose:
+                console.print("[yellow]⚠ Response had no remediation section; generating it separately[/yellow]")
+            remediation = self.generate_remediation(
+                reference_standard_text=reference_standard_text,
+                user_policy_text=user_policy_text,
+                gap_analysis=analysis_text,
+                framework_name=framework_name
+            )
+            if remediation is None:
+                console.print("[yellow]⚠ Remediation plan could not be generated; keeping the gap analysis[/yellow]")
+            remediation_text = remediation['remediation'] if remediation else None
+        elif self.verbose:
+            console.print("[green]✓ Remediation Plan Generated[/green]\n")
+        
+        return {
+            'framework': framework_name,
+            'analysis': analysis_text,
+            'remediation': remediation_text,
+            'model_used': self.model_name
+        }
     
-    def _create_remediation_prompt(self) -> str:
+    @staticmethod
+    def _split_fused_response(text: str) -> Tuple[str, Optional[str]]:
         """
-        Create the prompt template for remediation generation.
+        Split a fused response into its gap analysis and remediation parts.
+        
+        Returns:
+            (analysis, remediation); remediation is None if the marker is missing
         """
-        return """You are an expert cybersecurity policy writer and consultant.
-
-Based on the gap analysis performed against {framework_name}, you must now generate specific remediation recommendations and draft revised policy sections.
-
-**ORIGINAL POLICY:**
-{user_policy}
-
-**GAP ANALYSIS FINDINGS:**
-{gap_analysis}
-
-**YOUR REMEDIATION PLAN MUST INCLUDE:**
-
-1. **EXECUTIVE SUMMARY**: Brief overview of required changes (2-3 paragraphs).
-
-2. **SPECIFIC RECOMMENDATIONS**: For each identified gap, provide:
-   - Clear description of what needs to be added/changed
-   - Rationale based on the framework
-   - Implementation priority (Immediate, Short-term, Long-term)
-
-3. **REVISED POLICY SECTIONS**: Draft the actual policy text that should be added or modified. Write this in professional policy language, ready to be inserted into the organization's policy document.
-
-4. **IMPLEMENTATION ROADMAP**: Suggest a phased approach for implementing these changes.
-
-5. **COMPLIANCE VALIDATION**: List specific checkpoints to verify compliance after implementation.
-
-**OUTPUT FORMAT:**
-Provide a structured remediation plan with clear sections. Draft policy text should be clearly marked and ready for copy-paste into the organization's policy documents.
-
-Begin your remediation plan:"""
+        parts = _REMEDIATION_SPLIT.split(text, maxsplit=1)
+        analysis = _GAP_MARKER_LINE.sub('', parts[0], count=1).strip()
+        if len(parts) < 2:
+            return analysis, None
+        return analysis, parts[1].strip()
 
 
 # Standalone testing functionality
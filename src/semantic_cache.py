@@ -0,0 +1,166 @@
+"""
+Semantic Response Cache - Reuse gap analyses for near-duplicate policies
+Matches policies by embedding similarity so small wording edits still hit
+"""
+import hashlib
+import importlib.util
+import json
+import os
+from pathlib import Path
+from typing import Optional, Dict, List
+from rich.console import Console
+import config
+
+console = Console()
+
+# Characters per passage when embedding a policy; the embedding model only
+# reads a few hundred tokens at a time, so long policies are averaged
+# over passages instead of being truncated.
+PASSAGE_CHARS = 1000
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache for gap analysis results.
+
+    A policy is embedded with sentence-transformers and compared against
+    previously analyzed policies in a FAISS inner-product index. A stored
+    result is reused only when the reference framework and model are the
+    same and the cosine similarity reaches the configured threshold.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = config.CACHE_DIR,
+        threshold: float = config.SEMANTIC_CACHE_THRESHOLD,
+        embedding_model: str = "all-MiniLM-L6-v2",
+        verbose: bool = True
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            cache_dir: Directory holding the index and stored results
+            threshold: Minimum cosine similarity for a cache hit
+            embedding_model: sentence-transformers model used for embeddings
+            verbose: Enable detailed console output
+        """
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / "semcache.faiss"
+        self.entries_path = self.cache_dir / "semcache.json"
+        self.threshold = threshold
+        self.embedding_model = embedding_model
+        self.verbose = verbose
+        self._encoder = None
+        self._index = None
+        self._entries: List[Dict] = []
+
+    @staticmethod
+    def is_available() -> bool:
+        """Check whether the optional embedding dependencies are installed."""
+        return all(
+            importlib.util.find_spec(name) is not None
+            for name in ("sentence_transformers", "faiss", "numpy")
+        )
+
+    def lookup(self, user_policy_text: str, reference_text: str, model: str) -> Optional[Dict[str, str]]:
+        """
+        Find a stored gap analysis for a sufficiently similar policy.
+
+        Args:
+            user_policy_text: The organization's policy text
+            reference_text: The reference framework text
+            model: Name of the LLM model producing the analysis
+
+        Returns:
+            The stored gap analysis result, or None on a miss
+        """
+        self._load()
+        if self._index.ntotal == 0:
+            return None
+
+        reference_hash = _sha256(reference_text)
+        scores, ids = self._index.search(self._embed(user_policy_text), min(10, self._index.ntotal))
+
+        for score, idx in zip(scores[0], ids[0]):
+            if idx < 0 or score < self.threshold:
+                break
+            entry = self._entries[idx]
+            if entry['reference_hash'] == reference_hash and entry['model'] == model:
+                if self.verbose:
+                    console.print(f"[green]✓ Reusing analysis of a similar policy[/green] [dim](similarity {score:.3f})[/dim]")
+                return entry['result']
+
+        return None
+
+    def add(self, user_policy_text: str, reference_text: str, model: str, result: Dict[str, str]):
+        """
+        Store a gap analysis result for future lookups.
+
+        Args:
+            user_policy_text: The organization's policy text
+            reference_text: The reference framework text
+            model: Name of the LLM model that produced the analysis
+            result: Gap analysis result dictionary
+        """
+        self._load()
+        self._index.add(self._embed(user_policy_text))
+        self._entries.append({
+            'reference_hash': _sha256(reference_text),
+            'model': model,
+            'result': result
+        })
+        self._save()
+
+    def _embed(self, text: str):
+        """Embed a document as the normalized mean of its passage embeddings."""
+        import numpy as np
+
+        passages = [text[i:i + PASSAGE_CHARS] for i in range(0, len(text), PASSAGE_CHARS)] or [""]
+        vectors = self._encoder.encode(passages, normalize_embeddings=True)
+        mean = vectors.mean(axis=0)
+        mean /= max(float(np.linalg.norm(mean)), 1e-12)
+        return mean.reshape(1, -1).astype(np.float32)
+
+    def _load(self):
+        """Load the encoder, index and stored entries on first use."""
+        if self._index is not None:
+            return
+
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        self._encoder = SentenceTransformer(self.embedding_model)
+
+        if self.index_path.exists() and self.entries_path.exists():
+            try:
+                self._index = faiss.read_index(str(self.index_path))
+                self._entries = json.loads(self.entries_path.read_text(encoding='utf-8'))
+                if self._index.ntotal == len(self._entries):
+                    return
+            except (RuntimeError, OSError, ValueError):
+                pass
+            console.print("[yellow]⚠ Semantic cache is inconsistent, starting a new one[/yellow]")
+
+        self._index = faiss.IndexFlatIP(self._encoder.get_sentence_embedding_dimension())
+        self._entries = []
+
+    def _save(self):
+        """Persist the index and entries, replacing the previous files atomically."""
+        import faiss
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_index = self.index_path.with_suffix('.faiss.tmp')
+            tmp_entries = self.entries_path.with_suffix('.json.tmp')
+            faiss.write_index(self._index, str(tmp_index))
+            tmp_entries.write_text(json.dumps(self._entries, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_index, self.index_path)
+            os.replace(tmp_entries, self.entries_path)
+        except (RuntimeError, OSError) as e:
+            console.print(f"[yellow]⚠ Could not write semantic cache: {str(e)}[/yellow]")
+
+
+def _sha256(text: str) -> str:
+    """Hash text for exact-match comparisons."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()